@@ -2,26 +2,62 @@ import asyncio
 import time
 from typing import Dict, Any, List, Tuple, Optional, Set
 import httpx
+import importlib.util
 import json 
-import datetime 
 import re
+from collections import Counter
 from astrbot.api.event import filter, AstrMessageEvent
 from astrbot.api.star import Context, Star, register
 from astrbot.api import logger
 
+try:
+    import orjson # 可选依赖，安装后用于加速 JSON 解析
+except ImportError:
+    orjson = None
+
+# HTTP/2 需要 h2 (httpx[http2])，未安装时退回 HTTP/1.1
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# 用户 ID 提取用的正则，模块加载时预编译
+_CQ_AT_RE = re.compile(r'\[CQ:at,qq=(\d+)\]')
+_ASTR_AT_RE = re.compile(r'\[At:(\d+)\]')
+_PAREN_ID_RE = re.compile(r'\((\d+)\)')
+
+# 只读的空字典，用作缺失字段的默认值，避免循环中反复创建
+_EMPTY: Dict[str, Any] = {}
+
+# mcsm cmd 命令内容的最大长度
+CMD_MAX_LENGTH = 2000
+
+# mcsm cmd 发送命令后轮询日志的间隔 (秒)，总计约 1 秒
+CMD_LOG_POLL_DELAYS = (0.15, 0.25, 0.3, 0.3)
+
+# v10 状态码: -1:未知, 0:停止, 1:停止中, 2:启动中, 3:运行中喵
+STATUS_ICON = {3: "🟢", 0: "🔴", 1: "🟠", 2: "🟡", -1: "⚪"}
+
 class InstanceCooldownManager:
     """实例操作冷却时间管理"""
+    # 冷却时间 (秒)
+    _COOLDOWN = 10.0
+    # 记录数超过该值时清理已过期的条目
+    _MAX_ENTRIES = 512
+
     def __init__(self):
+        # 使用 time.monotonic()，不受系统时间调整影响
         self.cooldowns: Dict[str, float] = {}
 
     def check_cooldown(self, instance_id: str) -> bool:
         """检查实例是否在冷却中（10秒冷却）"""
-        last_time = self.cooldowns.get(instance_id, 0)
-        return time.time() - last_time < 10
+        last_time = self.cooldowns.get(instance_id)
+        return last_time is not None and time.monotonic() - last_time < self._COOLDOWN
 
     def set_cooldown(self, instance_id: str):
         """设置实例冷却时间"""
-        self.cooldowns[instance_id] = time.time()
+        now = time.monotonic()
+        self.cooldowns[instance_id] = now
+        # 条目过多时清理已过冷却期的记录，防止字典无限增长
+        if len(self.cooldowns) > self._MAX_ENTRIES:
+            self.cooldowns = {k: v for k, v in self.cooldowns.items() if now - v < self._COOLDOWN}
 
 def format_uptime_seconds(seconds: float) -> str:
     """将秒数转换为 天/小时/分钟 的可读格式"""
@@ -50,6 +86,24 @@ def format_uptime_seconds(seconds: float) -> str:
     # 限制只显示最长的两个单位，避免结果太长
     return "".join(parts[:2]) if len(parts) > 1 else "".join(parts)
 
+def format_memory_gb(bytes_value) -> str:
+    """将字节数转换为 GB 显示"""
+    if not isinstance(bytes_value, (int, float)) or bytes_value <= 0:
+        return "0.00 GB"
+    gb = bytes_value / (1024 * 1024 * 1024)
+    return f"{gb:.2f} GB"
+
+def skip_leading_tokens(text: str, count: int) -> str:
+    """跳过前 count 个以空白分隔的字段，返回剩余部分（只切片一次）"""
+    pos = 0
+    length = len(text)
+    for _ in range(count):
+        while pos < length and not text[pos].isspace():
+            pos += 1
+        while pos < length and text[pos].isspace():
+            pos += 1
+    return text[pos:]
+
 
 @register("MCSManager", "5060的3600马力", "MCSManager服务器管理插件", "2.0.25.12WNMCNXM") 
 class MCSMPlugin(Star):
@@ -57,21 +111,72 @@ class MCSMPlugin(Star):
         super().__init__(context)
         self.config = config
         self.cooldown_manager = InstanceCooldownManager()
-        self.http_client = httpx.AsyncClient(timeout=30.0)
+        # 预先计算请求地址与鉴权参数，避免每次请求重复处理配置
+        self._base_url = (self.config.get("mcsm_url") or "").rstrip('/')
+        self._api_url = self._base_url + "/api"
+        self._apikey_param = {"apikey": self.config.get("api_key", "")}
+        # 授权用户集合，与配置中的列表保持同步，用于 O(1) 权限判断
+        self._authorized_set: Set[str] = {str(uid) for uid in self.config.get("authorized_users", [])}
+        # 复用连接池 (可用时启用 HTTP/2 多路复用)，避免 list 并发查询时反复握手
+        self.http_client = httpx.AsyncClient(
+            timeout=30.0,
+            http2=_HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=32, keepalive_expiry=60.0),
+            headers={
+                "Content-Type": "application/json; charset=utf-8",
+                "X-Requested-With": "XMLHttpRequest"
+            }
+        )
+        # HTTP 方法分发表
+        self._method_map = {
+            "GET": self.http_client.get,
+            "POST": self.http_client.post,
+            "PUT": self.http_client.put,
+            "DELETE": self.http_client.delete,
+        }
         # 缓存实例数据，用于名称/编号/UUID查找
         self.instance_data: Dict[str, Any] = {
             "instances": [], # 实例列表 [{'index': str, 'name': str, 'daemon_id': str, 'uuid': str, 'status': int}, ...]
             "name_to_id": {}, # 仅存储唯一名称 -> (daemon_id, uuid) 映射
             "uuid_to_id": {}, # UUID -> (daemon_id, uuid) 映射
+            "uuid_to_name": {}, # UUID -> 实例名称 映射
+            "uuid_to_index": {}, # UUID -> instances 列表下标 映射
             "ambiguous_names": set(), # 存储所有重名实例的名称
         }
+        # 只读 GET 请求的短时响应缓存: (url, 参数) -> (时间戳, 响应)
+        self._resp_cache: Dict[tuple, Tuple[float, dict]] = {}
+        # 进行中的只读请求任务，用于合并重复的并发请求
+        self._inflight: Dict[tuple, asyncio.Task] = {}
+        # 缓存代数，失效时递增，旧代数发起的请求结果不再写入缓存
+        self._cache_generation = 0
+        # 限制并发查询节点的数量，避免节点过多时压垮面板
+        self._fanout_sem = asyncio.Semaphore(max(1, int(self.config.get("max_concurrency", 8))))
+        # 后台任务集合，插件卸载时统一取消
+        self._bg_tasks: Set[asyncio.Task] = set()
+        # 启动时预热连接，让首次指令复用已建立的连接
+        if self._base_url:
+            warmup = self._warmup()
+            try:
+                self._spawn(warmup)
+            except RuntimeError:
+                warmup.close() # 没有运行中的事件循环时跳过预热
         logger.info("MCSM插件(v10)初始化完成喵~出现问题及时提issue！")
 
     async def terminate(self):
-        """插件卸载时关闭HTTP客户端"""
+        """插件卸载时取消后台任务并关闭HTTP客户端"""
+        for task in list(self._bg_tasks):
+            task.cancel()
+        await asyncio.gather(*self._bg_tasks, return_exceptions=True)
         await self.http_client.aclose()
         logger.info("MCSM插件已卸载")
 
+    def _spawn(self, coro) -> asyncio.Task:
+        """创建后台任务并登记，任务结束后自动移除"""
+        task = asyncio.get_running_loop().create_task(coro)
+        self._bg_tasks.add(task)
+        task.add_done_callback(self._bg_tasks.discard)
+        return task
+
     def _extract_user_id(self, raw_id: str) -> str:
         """
         从 CQ 码、自定义 At 格式或纯字符串中提取用户 ID
@@ -79,17 +184,17 @@ class MCSMPlugin(Star):
         raw_id = raw_id.strip()
         
         # 1. 匹配标准 QQ-CQ 码格式: [CQ:at,qq=ID]
-        match = re.search(r'\[CQ:at,qq=(\d+)\]', raw_id)
+        match = _CQ_AT_RE.search(raw_id)
         if match:
             return match.group(1)
 
         # 2. 匹配 AstrBot 自定义 At 格式: [At:ID]
-        match = re.search(r'\[At:(\d+)\]', raw_id)
+        match = _ASTR_AT_RE.search(raw_id)
         if match:
             return match.group(1)
 
         # 3. 匹配 QQ/群聊 @ 格式: @Name(ID) 或其他包含 ID 在括号内的格式
-        match = re.search(r'\((\d+)\)', raw_id)
+        match = _PAREN_ID_RE.search(raw_id)
         if match:
             return match.group(1)
         
@@ -100,91 +205,193 @@ class MCSMPlugin(Star):
         # 否则原样返回
         return raw_id
 
-    async def make_mcsm_request(self, endpoint: str, method: str = "GET", params: dict = None, data: dict = None) -> dict:
-        """发送请求到MCSManager API"""
-        base_url = self.config['mcsm_url'].rstrip('/')
-        
+    async def make_mcsm_request(self, endpoint: str, method: str = "GET", params: Optional[dict] = None,
+                                data: Optional[dict] = None, use_cache: bool = False) -> dict:
+        """
+        发送请求到MCSManager API
+        use_cache=True 时，只读 GET 请求的成功响应会在 cache_ttl 秒内复用，
+        且相同的并发请求只会实际发送一次。
+        """
         if not endpoint.startswith('/api/'):
-            url = f"{base_url}/api{endpoint}"
+            url = self._api_url + endpoint
         else:
-            url = f"{base_url}{endpoint}"
-        
-        query_params = {"apikey": self.config["api_key"]}
-        if params:
-            query_params.update(params)
-
-        headers = {
-            "Content-Type": "application/json; charset=utf-8",
-            "X-Requested-With": "XMLHttpRequest"
-        }
-
+            url = self._base_url + endpoint
+        
+        # 无额外参数时直接复用共享的鉴权参数字典
+        query_params = {**self._apikey_param, **params} if params else self._apikey_param
+
+        method = method.upper()
+        if not (use_cache and method == "GET"):
+            return await self._send_request(method, url, query_params, data)
+
+        cache_key = (url, tuple(sorted(query_params.items())))
+        cached = self._resp_cache.get(cache_key)
+        if cached and time.monotonic() - cached[0] < self.config.get("cache_ttl", 3):
+            return cached[1]
+
+        # 相同请求共享同一个后台任务，所有调用方 (包括发起方) 都通过 shield 等待，
+        # 任何一个调用方被取消都不会取消共享的请求
+        task = self._inflight.get(cache_key)
+        if task is None:
+            task = self._spawn(self._fetch_and_cache(cache_key, method, url, query_params, data))
+            self._inflight[cache_key] = task
+            task.add_done_callback(lambda t, key=cache_key: self._on_inflight_done(key, t))
+        return await asyncio.shield(task)
+
+    async def _fetch_and_cache(self, cache_key: tuple, method: str, url: str, query_params: dict,
+                               data: Optional[dict]) -> dict:
+        """发送只读请求，成功时写入响应缓存"""
+        generation = self._cache_generation
+        result = await self._send_request(method, url, query_params, data)
+        # 请求期间缓存已失效时，结果可能是过期数据，不写入缓存
+        if generation == self._cache_generation and isinstance(result, dict) and result.get("status") == 200:
+            self._resp_cache[cache_key] = (time.monotonic(), result)
+        return result
+
+    def _on_inflight_done(self, cache_key: tuple, task: asyncio.Task):
+        """共享请求结束后移出进行中列表"""
+        if self._inflight.get(cache_key) is task:
+            del self._inflight[cache_key]
+        # 所有调用方都已取消时也读取一次异常，避免 "never retrieved" 警告
+        if not task.cancelled():
+            task.exception()
+
+    async def _send_request(self, method: str, url: str, query_params: dict, data: Optional[dict]) -> dict:
+        """实际发送 HTTP 请求并解析响应"""
         try:
-            if method.upper() == "GET":
-                response = await self.http_client.get(url, params=query_params, headers=headers)
-            elif method.upper() == "POST":
-                response = await self.http_client.post(url, params=query_params, json=data, headers=headers)
-            elif method.upper() == "PUT":
-                response = await self.http_client.put(url, params=query_params, json=data, headers=headers)
-            elif method.upper() == "DELETE":
-                response = await self.http_client.delete(url, params=query_params, json=data, headers=headers)
-            else:
+            request_fn = self._method_map.get(method)
+            if request_fn is None:
                 return {"status": 400, "error": "不支持的请求方法"}
 
-            if response.status_code != 200:
-                try:
-                    # 尝试解析错误信息
-                    return response.json()
-                except:
-                    # 如果不是JSON，返回文本信息
-                    return {"status": response.status_code, "error": f"HTTP Error {response.status_code}: {response.text[:100]}..."}
+            kwargs = {"params": query_params}
+            if method != "GET":
+                kwargs["json"] = data
+            response = await request_fn(url, **kwargs)
+
+            # 按 Content-Type 判断是否为 JSON，非 200 时也尝试解析错误信息
+            if not response.headers.get("content-type", "").startswith("application/json"):
+                # 如果不是JSON，返回文本信息 (只解码前 200 字节)
+                snippet = response.content[:200].decode("utf-8", "replace")
+                if not response.is_success:
+                    return {"status": response.status_code, "error": f"HTTP Error {response.status_code}: {snippet}..."}
+                return {"status": 500, "error": f"响应不是JSON: {snippet}..."}
 
             try:
-                return response.json()
-            except Exception as json_e:
+                payload = orjson.loads(response.content) if orjson else response.json()
+            except ValueError as json_e:
                 return {"status": 500, "error": f"JSON解析失败: {str(json_e)}"}
+            if payload is None:
+                return {"status": 500, "error": "JSON解析失败: 响应为空"}
+
+            return payload
 
         except httpx.ConnectTimeout as e:
             return {"status": 504, "error": "连接超时 (ConnectTimeout)"}
         except httpx.ReadTimeout as e:
             return {"status": 504, "error": "读取超时 (ReadTimeout)"}
-        except Exception as e:
-            logger.error(f"MCSM API请求失败: {str(e)}")
+        except (httpx.HTTPError, httpx.InvalidURL) as e:
+            logger.error("MCSM API请求失败: %s", e)
             return {"status": 500, "error": str(e)}
 
+    async def _warmup(self):
+        """预先请求一次 /overview，提前完成 TCP/TLS 握手"""
+        try:
+            await self._get_overview()
+        except Exception as e:
+            logger.debug("MCSM 连接预热失败: %s", e)
+
+    async def _get_overview(self) -> dict:
+        """获取 /overview (status/list 共用)，在 cache_ttl 秒内复用响应缓存"""
+        return await self.make_mcsm_request("/overview", use_cache=True)
+
+    async def _bounded(self, coro):
+        """在并发信号量限制下执行协程"""
+        async with self._fanout_sem:
+            return await coro
+
+    def _mark_instance_status(self, instance_id: str, status: int):
+        """操作成功后就地更新缓存状态，并使响应缓存 (含 /overview) 失效"""
+        idx = self.instance_data.get("uuid_to_index", {}).get(instance_id)
+        if idx is not None:
+            self.instance_data["instances"][idx]['status'] = status
+        self._cache_generation += 1
+        self._resp_cache.clear()
+        # 之后的调用方不再加入失效前发起的请求
+        self._inflight.clear()
+
     def is_admin_or_authorized(self, event: AstrMessageEvent) -> bool:
         """检查用户权限"""
         if event.is_admin():
             return True
-        return str(event.get_sender_id()) in self.config.get("authorized_users", [])
+        return str(event.get_sender_id()) in self._authorized_set
 
     def _get_instance_by_identifier(self, identifier: str) -> Optional[Tuple[str, str]]:
         """
         通过实例名、索引或 UUID 查找对应的 (daemonId, instanceUuid)。
         """
         identifier = identifier.strip()
+        data = self.instance_data
         
         # 1. 尝试通过索引查找 (数字)
         if identifier.isdigit():
             index = int(identifier)
-            instances = self.instance_data.get("instances", [])
+            instances = data["instances"]
             # 索引是 1-based, 列表是 0-based
             if 0 < index <= len(instances):
                 instance_data = instances[index - 1]
                 return instance_data['daemon_id'], instance_data['uuid']
         
-        # 2. 尝试通过名称或 UUID 查找 (字符串)
-        
-        # 检查是否是重名实例，如果是，则不允许通过名称操作
-        if identifier in self.instance_data.get("ambiguous_names", set()):
-            logger.warning(f"用户尝试通过重名实例名称操作: {identifier}。已拒绝。")
+        # 2. 尝试通过 UUID 查找
+        hit = data["uuid_to_id"].get(identifier)
+        if hit:
+            return hit
+
+        # 3. 尝试通过名称查找，重名实例不允许通过名称操作
+        if identifier in data["ambiguous_names"]:
+            logger.warning("用户尝试通过重名实例名称操作: %s。已拒绝。", identifier)
             return None
 
-        if identifier in self.instance_data["name_to_id"]:
-            return self.instance_data["name_to_id"][identifier]
-        
-        if identifier in self.instance_data["uuid_to_id"]:
-            return self.instance_data["uuid_to_id"][identifier]
+        return data["name_to_id"].get(identifier)
 
+    def _resolve_instance(self, identifier: str, action_name: str, use_cooldown: bool = True,
+                          ambiguous_hint: str = "请使用 编号/UUID 进行操作。",
+                          not_found_hint: str = "请确认名称/编号或/UUID正确，并先运行 /mcsm list 更新列表。") -> Tuple[str, str, str, Optional[str]]:
+        """
+        解析实例标识并做冷却检查，返回 (daemon_id, instance_id, instance_name, err_msg)。
+        err_msg 不为 None 时表示无法继续操作。
+        """
+        ids = self._get_instance_by_identifier(identifier)
+        if not ids:
+            # 检查是否是重名导致的查找失败
+            if identifier in self.instance_data.get("ambiguous_names", set()):
+                return "", "", identifier, f"❌ {action_name}失败: 实例名称 '{identifier}' 重复。{ambiguous_hint}"
+            return "", "", identifier, f"❌ 找不到实例: {identifier}。{not_found_hint}"
+
+        daemon_id, instance_id = ids
+
+        if use_cooldown and self.cooldown_manager.check_cooldown(instance_id):
+            return daemon_id, instance_id, identifier, "⏳ 操作太快了，请稍后再试"
+
+        # Fetch instance name for better messaging
+        instance_name = self.instance_data.get("uuid_to_name", {}).get(instance_id, identifier)
+        return daemon_id, instance_id, instance_name, None
+
+    async def _dispatch_instance_action(self, daemon_id: str, instance_id: str, action_name: str, endpoint: str,
+                                        extra_params: Optional[dict] = None, use_cooldown: bool = True) -> Optional[str]:
+        """向实例发送操作请求，成功返回 None，失败返回错误提示"""
+        params = {"uuid": instance_id, "daemonId": daemon_id}
+        if extra_params:
+            params.update(extra_params)
+
+        resp = await self.make_mcsm_request(endpoint, method="GET", params=params)
+
+        if resp.get("status") != 200:
+            err = resp.get("data") or resp.get("error") or "未知错误"
+            status_code = resp.get("status", "???")
+            return f"❌ {action_name}失败: [{status_code}] {err}"
+
+        if use_cooldown:
+            self.cooldown_manager.set_cooldown(instance_id)
         return None
 
     @filter.command("mcsm help")
@@ -230,6 +437,7 @@ class MCSMPlugin(Star):
 
         authorized_users.append(user_id)
         self.config["authorized_users"] = authorized_users
+        self._authorized_set.add(user_id)
         
         try:
             self.context.save_config()
@@ -256,6 +464,7 @@ class MCSMPlugin(Star):
 
         authorized_users.remove(user_id)
         self.config["authorized_users"] = authorized_users
+        self._authorized_set.discard(user_id)
         
         try:
             self.context.save_config()
@@ -274,7 +483,7 @@ class MCSMPlugin(Star):
 
         yield event.plain_result("正在获取节点和实例数据，请稍候...")
 
-        overview_resp = await self.make_mcsm_request("/overview")
+        overview_resp = await self._get_overview()
         
         nodes: List[Dict[str, Any]] = []
         if overview_resp.get("status") == 200:
@@ -289,111 +498,132 @@ class MCSMPlugin(Star):
         all_instances: List[Dict[str, Any]] = []
         node_details: Dict[str, Dict[str, str]] = {} # To store node info for the final list
 
-        # 1. 收集所有实例
-        for node in nodes:
+        # 1. 并发查询所有节点下的实例 (兼容 v10 API)
+        tasks = [
+            self._bounded(self.make_mcsm_request(
+                "/service/remote_service_instances",
+                params={"daemonId": node.get("uuid"), "page": 1, "page_size": 100},
+                use_cache=True
+            ))
+            for node in nodes
+        ]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        # 2. 收集所有实例
+        for node, instances_resp in zip(nodes, results):
             node_uuid = node.get("uuid")
             node_name = node.get("remarks") or node.get("ip") or "Unnamed Node"
-            
+
             node_details[node_uuid] = {"name": node_name}
 
-            # 兼容 v10 API，查询指定节点下的实例
-            instances_resp = await self.make_mcsm_request(
-                "/service/remote_service_instances",
-                params={"daemonId": node_uuid, "page": 1, "page_size": 100}
-            )
+            if isinstance(instances_resp, BaseException):
+                logger.error("获取节点 %s 实例失败: %s", node_name, instances_resp)
+                continue
 
             if instances_resp.get("status") != 200:
                 # Log error but continue to next node
                 continue
 
-            data_block = instances_resp.get("data", {})
-            # 兼容 API 返回数据结构不一致的情况
-            instances = data_block.get("data", []) if isinstance(data_block, dict) else data_block
-            
-            for instance in instances:
-                inst_name = instance.get("config", {}).get("nickname") or "未命名"
-                inst_uuid = instance.get("instanceUuid")
-                status_code = instance.get("status")
-                if status_code is None and "info" in instance:
-                    status_code = instance["info"].get("status")
-                
-                all_instances.append({
-                    "name": inst_name,
-                    "uuid": inst_uuid,
-                    "daemon_id": node_uuid,
-                    "status": status_code,
-                })
+            # 单个节点数据异常时跳过该节点，不影响其他节点
+            try:
+                data_block = instances_resp.get("data", {})
+                # 兼容 API 返回数据结构不一致的情况
+                instances = data_block.get("data", []) if isinstance(data_block, dict) else data_block
+
+                node_instances: List[Dict[str, Any]] = []
+                for instance in instances:
+                    cfg = instance.get("config") or _EMPTY
+                    inst_name = cfg.get("nickname") or "未命名"
+                    inst_uuid = instance.get("instanceUuid")
+                    status_code = instance.get("status")
+                    # 注意 0 (停止) 是有效状态，只有缺失时才回退到 info
+                    if status_code is None:
+                        status_code = (instance.get("info") or _EMPTY).get("status")
+
+                    node_instances.append({
+                        "name": inst_name,
+                        "uuid": inst_uuid,
+                        "daemon_id": node_uuid,
+                        "status": status_code,
+                    })
+            except (AttributeError, TypeError) as e:
+                logger.error("解析节点 %s 实例数据失败: %s", node_name, e)
+                continue
+
+            all_instances.extend(node_instances)
         
-        # 2. A-Z 排序
+        # 3. A-Z 排序
         all_instances.sort(key=lambda x: x['name'])
         
-        # 3. 预处理: 找出重名实例
-        name_counts: Dict[str, int] = {}
-        for instance in all_instances:
-            name = instance['name']
-            name_counts[name] = name_counts.get(name, 0) + 1
-
+        # 4. 预处理: 找出重名实例
+        name_counts = Counter(instance['name'] for instance in all_instances)
         ambiguous_names: Set[str] = {name for name, count in name_counts.items() if count > 1}
 
-        # 4. 构建缓存和输出结果
-        self.instance_data["instances"] = []
-        self.instance_data["name_to_id"] = {} # 仅存储唯一名称的映射
-        self.instance_data["uuid_to_id"] = {}
+        # 5. 构建缓存和输出结果
+        cached_instances: List[Dict[str, Any]] = []
+        name_to_id: Dict[str, Tuple[str, str]] = {} # 仅存储唯一名称的映射
+        uuid_to_id: Dict[str, Tuple[str, str]] = {}
+        uuid_to_name: Dict[str, str] = {}
+        uuid_to_index: Dict[str, int] = {}
+        self.instance_data["instances"] = cached_instances
+        self.instance_data["name_to_id"] = name_to_id
+        self.instance_data["uuid_to_id"] = uuid_to_id
+        self.instance_data["uuid_to_name"] = uuid_to_name
+        self.instance_data["uuid_to_index"] = uuid_to_index
         self.instance_data["ambiguous_names"] = ambiguous_names # 存储重名集合
         
-        result = "🖥️ MCSM 实例列表:\n"
+        parts = ["🖥️ MCSM 实例列表:\n"]
         
         current_index = 1
         last_daemon_id = None
-        
-        # v10 状态码: -1:未知, 0:停止, 1:停止中, 2:启动中, 3:运行中喵
-        status_map = {3: "🟢", 0: "🔴", 1: "🟠", 2: "🟡", -1: "⚪"}
+        status_icon_get = STATUS_ICON.get
 
         for instance in all_instances:
             inst_name = instance['name']
             inst_uuid = instance['uuid']
             daemon_id = instance['daemon_id']
-            status_icon = status_map.get(instance['status'], "⚪")
+            inst_status = instance['status']
+            status_icon = status_icon_get(inst_status, "⚪")
             is_ambiguous = inst_name in ambiguous_names # 检查是否重名
 
             # 打印节点分隔符
             if daemon_id != last_daemon_id:
-                node_name = node_details.get(daemon_id, {}).get("name", "未知节点")
-                result += f"\n📂 节点: {node_name}\n"
-                result += f"Daemon ID: {daemon_id}\n"
+                node_name = node_details.get(daemon_id, _EMPTY).get("name", "未知节点")
+                parts.append(f"\n📂 节点: {node_name}\nDaemon ID: {daemon_id}\n")
                 last_daemon_id = daemon_id
 
             # 打印实例信息 (带编号)
             ambiguity_tag = " (⚠️重名)" if is_ambiguous else "" # 添加重名标记
-            result += f"[{current_index}] {status_icon} {inst_name}{ambiguity_tag}\n"
+            parts.append(f"[{current_index}] {status_icon} {inst_name}{ambiguity_tag}\n")
             
             # 构建缓存数据
-            instance_data = {
+            ids = (daemon_id, inst_uuid)
+            uuid_to_index[inst_uuid] = len(cached_instances)
+            cached_instances.append({
                 "index": str(current_index),
                 "name": inst_name,
                 "uuid": inst_uuid,
                 "daemon_id": daemon_id,
-                "status": instance['status']
-            }
-            
-            self.instance_data["instances"].append(instance_data)
-            self.instance_data["uuid_to_id"][inst_uuid] = (daemon_id, inst_uuid)
+                "status": inst_status
+            })
+            uuid_to_id[inst_uuid] = ids
+            uuid_to_name[inst_uuid] = inst_name
             
             # 只有唯一名称才加入 name_to_id，重名名称不加入喵
             if not is_ambiguous:
-                self.instance_data["name_to_id"][inst_name] = (daemon_id, inst_uuid)
+                name_to_id[inst_name] = ids
             
             current_index += 1
         
         if not all_instances:
-             result += "\n(此面板下暂无实例)\n"
+             parts.append("\n(此面板下暂无实例)\n")
              
-        result += "\n💡 提示: 使用 /mcsm start [名称/编号] 即可操作。"
+        parts.append("\n💡 提示: 使用 /mcsm start [名称/编号] 即可操作。")
         if ambiguous_names:
-            result += "\n\n⚠️ 注意: 标记 '⚠️重名' 的实例，请使用编号/UUID 进行操作。"
+            parts.append("\n\n⚠️ 注意: 标记 '⚠️重名' 的实例，请使用编号/UUID 进行操作。")
 
 
-        yield event.plain_result(result)
+        yield event.plain_result("".join(parts))
 
     @filter.command("mcsm start")
     async def mcsm_start(self, event: AstrMessageEvent, identifier: str):
@@ -402,47 +632,19 @@ class MCSMPlugin(Star):
             yield event.plain_result("❌ 权限不足")
             return
 
-        # Lookup instance by identifier
-        ids = self._get_instance_by_identifier(identifier)
-        if not ids:
-            # 检查是否是重名导致的查找失败
-            if identifier in self.instance_data.get("ambiguous_names", set()):
-                 yield event.plain_result(f"❌ 启动失败: 实例名称 '{identifier}' 重复。重复。请使用 编号/UUID 进行操作。")
-            else:
-                 yield event.plain_result(f"❌ 找不到实例: {identifier}。请确认名称/编号或/UUID正确，并先运行 /mcsm list 更新列表。")
-            return
-        
-        daemon_id, instance_id = ids
-
-        if self.cooldown_manager.check_cooldown(instance_id):
-            yield event.plain_result("⏳ 操作太快了，请稍后再试")
+        daemon_id, instance_id, instance_name, err_msg = self._resolve_instance(identifier, "启动")
+        if err_msg:
+            yield event.plain_result(err_msg)
             return
 
-        # Fetch instance name for better messaging
-        instance_name = identifier
-        try:
-            for data in self.instance_data.get("instances", []):
-                if data['uuid'] == instance_id:
-                    instance_name = data['name']
-                    break
-        except Exception:
-            pass # Use identifier if lookup fails
-
         yield event.plain_result(f"🚀 正在启动: {instance_name} ...")
 
-        start_resp = await self.make_mcsm_request(
-            "/protected_instance/open", 
-            method="GET", 
-            params={"uuid": instance_id, "daemonId": daemon_id} 
-        )
-        
-        if start_resp.get("status") != 200:
-            err = start_resp.get("data") or start_resp.get("error") or "未知错误"
-            status_code = start_resp.get("status", "???")
-            yield event.plain_result(f"❌ 启动失败: [{status_code}] {err}")
+        err_msg = await self._dispatch_instance_action(daemon_id, instance_id, "启动", "/protected_instance/open")
+        if err_msg:
+            yield event.plain_result(err_msg)
             return
 
-        self.cooldown_manager.set_cooldown(instance_id)
+        self._mark_instance_status(instance_id, 2) # 2: 启动中
         yield event.plain_result(f"✅ {instance_name} 启动命令已发送")
 
     @filter.command("mcsm stop")
@@ -452,47 +654,19 @@ class MCSMPlugin(Star):
             yield event.plain_result("❌ 权限不足")
             return
 
-        # Lookup instance by identifier
-        ids = self._get_instance_by_identifier(identifier)
-        if not ids:
-            # 检查是否是重名导致的查找失败
-            if identifier in self.instance_data.get("ambiguous_names", set()):
-                 yield event.plain_result(f"❌ 停止失败: 实例名称 '{identifier}' 重复。请使用 编号/UUID 进行操作。")
-            else:
-                 yield event.plain_result(f"❌ 找不到实例: {identifier}。请确认名称/编号或/UUID正确，并先运行 /mcsm list 更新列表。")
-            return
-        
-        daemon_id, instance_id = ids
-
-        if self.cooldown_manager.check_cooldown(instance_id):
-            yield event.plain_result("⏳ 操作太快了，请稍后再试")
+        daemon_id, instance_id, instance_name, err_msg = self._resolve_instance(identifier, "停止")
+        if err_msg:
+            yield event.plain_result(err_msg)
             return
 
-        # Fetch instance name for better messaging
-        instance_name = identifier
-        try:
-            for data in self.instance_data.get("instances", []):
-                if data['uuid'] == instance_id:
-                    instance_name = data['name']
-                    break
-        except Exception:
-            pass # Use identifier if lookup fails
-        
         yield event.plain_result(f"🛑 正在停止: {instance_name} ...")
 
-        stop_resp = await self.make_mcsm_request(
-            "/protected_instance/stop",
-            method="GET",
-            params={"uuid": instance_id, "daemonId": daemon_id}
-        )
-
-        if stop_resp.get("status") != 200:
-            err = stop_resp.get("data") or stop_resp.get("error") or "未知错误"
-            status_code = stop_resp.get("status", "???")
-            yield event.plain_result(f"❌ 停止失败: [{status_code}] {err}")
+        err_msg = await self._dispatch_instance_action(daemon_id, instance_id, "停止", "/protected_instance/stop")
+        if err_msg:
+            yield event.plain_result(err_msg)
             return
 
-        self.cooldown_manager.set_cooldown(instance_id)
+        self._mark_instance_status(instance_id, 1) # 1: 停止中
         yield event.plain_result(f"✅ {instance_name} 停止命令已发送")
 
     @filter.command("mcsm cmd")
@@ -502,72 +676,62 @@ class MCSMPlugin(Star):
             yield event.plain_result("❌ 权限不足")
             return
 
-        raw_msg = event.message_str.strip()
-        parts = raw_msg.split(maxsplit=3)
+        # 跳过 /mcsm、cmd、identifier 三个字段，剩余部分即命令内容
+        full_command = skip_leading_tokens(event.message_str.strip(), 3)
         
-        if len(parts) < 4:
+        if not full_command:
             yield event.plain_result("⚠️ 参数不足。用法: /mcsm cmd [名称/编号] [命令内容]")
             return
-        
-        # parts[0]=/mcsm, parts[1]=cmd, parts[2]=identifier, parts[3]=命令内容
-        full_command = parts[3].strip()
 
-        # Lookup instance by identifier
-        ids = self._get_instance_by_identifier(identifier)
-        if not ids:
-             # 检查是否是重名导致的查找失败
-            if identifier in self.instance_data.get("ambiguous_names", set()):
-                 yield event.plain_result(f"❌ 发送失败: 实例名称 '{identifier}' 重复。请使用 /mcsm list 中的 编号/UUID 进行操作。")
-            else:
-                 yield event.plain_result(f"❌ 找不到实例: {identifier}。请确认名称、编号/UUID 正确，并先运行 /mcsm list 更新列表。")
+        # 命令通过查询参数发送，过长会超出 URL 长度限制
+        if len(full_command) > CMD_MAX_LENGTH:
+            yield event.plain_result(f"⚠️ 命令过长 ({len(full_command)} 字符)，最多支持 {CMD_MAX_LENGTH} 字符。")
             return
-        
-        daemon_id, instance_id = ids
 
-        # Fetch instance name for better messaging
-        instance_name = identifier
-        try:
-            for data in self.instance_data.get("instances", []):
-                if data['uuid'] == instance_id:
-                    instance_name = data['name']
-                    break
-        except Exception:
-            pass # Use identifier if lookup fails
+        daemon_id, instance_id, instance_name, err_msg = self._resolve_instance(
+            identifier, "发送", use_cooldown=False,
+            ambiguous_hint="请使用 /mcsm list 中的 编号/UUID 进行操作。",
+            not_found_hint="请确认名称、编号/UUID 正确，并先运行 /mcsm list 更新列表。"
+        )
+        if err_msg:
+            yield event.plain_result(err_msg)
+            return
         
         yield event.plain_result(f"📢 正在向 {instance_name} 发送命令: {full_command}")
 
-        cmd_resp = await self.make_mcsm_request(
-            "/protected_instance/command",
-            method="GET",
-            params={
-                "uuid": instance_id,
-                "daemonId": daemon_id,
-                "command": full_command
-            }
-        )
+        # 发送前先取一次日志快照，用于判断命令是否产生了新输出
+        log_params = {"uuid": instance_id, "daemonId": daemon_id}
+        snapshot_resp = await self.make_mcsm_request("/protected_instance/outputlog", method="GET", params=log_params)
+        snapshot = snapshot_resp.get("data") if snapshot_resp.get("status") == 200 else None
 
-        if cmd_resp.get("status") != 200:
-            err = cmd_resp.get("data") or cmd_resp.get("error") or "未知错误"
-            status_code = cmd_resp.get("status", "???")
-            yield event.plain_result(f"❌ 发送失败: [{status_code}] {err}")
+        err_msg = await self._dispatch_instance_action(
+            daemon_id, instance_id, "发送", "/protected_instance/command",
+            extra_params={"command": full_command}, use_cooldown=False
+        )
+        if err_msg:
+            yield event.plain_result(err_msg)
             return
 
-        await asyncio.sleep(1) 
-
-        output_resp = await self.make_mcsm_request(
-            "/protected_instance/outputlog",
-            method="GET",
-            params={"uuid": instance_id, "daemonId": daemon_id}
-        )
+        # 短间隔轮询日志，与快照不同即返回，最多等待约 1 秒
+        # 快照获取失败时无法判断新输出，等满全部轮询时间
+        output_resp: dict = {}
+        for delay in CMD_LOG_POLL_DELAYS:
+            await asyncio.sleep(delay)
+            output_resp = await self.make_mcsm_request("/protected_instance/outputlog", method="GET", params=log_params)
+            if output_resp.get("status") != 200:
+                continue
+            output_data = output_resp.get("data")
+            if snapshot is not None and output_data and output_data != snapshot:
+                break
 
         output = "无返回数据"
         if output_resp.get("status") == 200:
             output_data = output_resp.get("data")
-            if output_data and isinstance(output_data, str):
-                output = output_data or "无最新日志"
+            # 提取时统一转为字符串，后续截断无需再判断类型
+            output = str(output_data or "无最新日志")
         
-        if isinstance(output, str) and len(output) > 500:
-            output = "..." + output[-500:]
+        if len(output) > 500:
+            output = f"...{output[-500:]}"
 
         yield event.plain_result(f"✅ 命令已发送\n📝 最近日志:\n{output}")
 
@@ -628,13 +792,7 @@ class MCSMPlugin(Star):
             yield event.plain_result("❌ 权限不足")
             return
 
-        def format_memory_gb(bytes_value):
-            if not isinstance(bytes_value, (int, float)) or bytes_value <= 0:
-                return "0.00 GB"
-            gb = bytes_value / (1024 * 1024 * 1024)
-            return f"{gb:.2f} GB"
-        
-        overview_resp = await self.make_mcsm_request("/overview")
+        overview_resp = await self._get_overview()
         if overview_resp.get("status") != 200:
             err_msg = overview_resp.get('error', '未知连接错误，请检查配置')
             yield event.plain_result(f"❌ 获取状态失败: {err_msg}")
@@ -656,52 +814,52 @@ class MCSMPlugin(Star):
         panel_time_formatted = "未知时间"
         if panel_timestamp_ms and isinstance(panel_timestamp_ms, (int, float)):
             try:
-                dt_object = datetime.datetime.fromtimestamp(panel_timestamp_ms / 1000.0)
-                panel_time_formatted = dt_object.strftime("%Y-%m-%d %H:%M:%S")
-            except ValueError:
+                panel_time_formatted = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(panel_timestamp_ms / 1000.0))
+            except (ValueError, OverflowError, OSError):
                 panel_time_formatted = "时间戳错误"
 
         os_system_uptime = data.get("system", {}).get("uptime")
         os_uptime_formatted = format_uptime_seconds(os_system_uptime)
         
-        logger.info(f"OS/Server raw uptime (from panel system): {os_system_uptime} seconds")
+        logger.info("OS/Server raw uptime (from panel system): %s seconds", os_system_uptime)
 
 
-        status_text = (
+        status_parts = [
             f"📊 MCSM v{mcsm_version} 状态概览:\n"
             f"  - 数据时间: {panel_time_formatted}\n"
             "----------------------\n"
-        )
+        ]
         
         if "remote" in data:
             for i, node in enumerate(data["remote"]):
-                node_sys = node.get("system", {})
-                inst_info = node.get("instance", {})
+                node_sys = node.get("system", {}) or {}
+                inst_info = node.get("instance", {}) or {}
                 
-                total_instances += inst_info.get("total", 0)
-                running_instances += inst_info.get("running", 0)
+                # 一次性取出所需字段，避免重复查字典
+                inst_running = inst_info.get("running", 0)
+                inst_total = inst_info.get("total", 0)
+                total_instances += inst_total
+                running_instances += inst_running
 
                 node_name = node.get("remarks") or node.get("hostname") or f"Unnamed Node ({i+1})"
                 node_version = node.get("version", "未知")
                 
                 os_version = node_sys.get("version") or node_sys.get("release") or "未知"
+                cpu_usage = node_sys.get("cpuUsage", 0)
+                mem_total_bytes = node_sys.get("totalmem", 0)
+                mem_usage_ratio = node_sys.get("memUsage", 0)
                 
                 # CPU 占用喵
-                node_cpu_percent = f"{(node_sys.get('cpuUsage', 0) * 100):.2f}%" 
+                node_cpu_percent = f"{(cpu_usage * 100):.2f}%" 
                 
                 # 内存占用喵
-                mem_total_bytes = node_sys.get("totalmem", 0)
-                mem_usage_ratio = node_sys.get("memUsage", 0)
-                mem_used_bytes = mem_total_bytes * mem_usage_ratio
+                mem_used_bytes = mem_total_bytes * mem_usage_ratio if mem_usage_ratio else 0
                 
                 mem_used_formatted = format_memory_gb(mem_used_bytes)
                 mem_total_formatted = format_memory_gb(mem_total_bytes)
-                
-                inst_running = inst_info.get("running", 0)
-                inst_total = inst_info.get("total", 0)
 
 
-                status_text += (
+                status_parts.append(
                     f"🖥️ 节点: {node_name}\n"
                     f"- 状态: {'🟢 在线' if node.get('available') else '🔴 离线'}\n"
                     f"- 节点版本: {node_version}\n"
@@ -712,11 +870,11 @@ class MCSMPlugin(Star):
                     "----------------------\n"
                 )
 
-        status_text += (
+        status_parts.append(
             f"- 在线时间: {os_uptime_formatted}\n" 
             f"总节点状态: {r_avail} 在线 / {r_total} 总数\n"
             f"实例运行状态: {running_instances} / {total_instances}\n"
             f"提示: 使用 /mcsm list 查看详情"
         )
 
-        yield event.plain_result(status_text)
+        yield event.plain_result("".join(status_parts))